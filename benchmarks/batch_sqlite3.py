@@ -0,0 +1,45 @@
+"""benchmark of write batching: per-row commit vs batch_size on sqlite3 file
+
+usage: python benchmarks/batch_sqlite3.py [--rows 2000] [--batch-size 100]
+"""
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+import click
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))   # run without install
+from pstyle.wrapper import DBWrapper   # noqa: E402
+from pstyle.convert import Pstyle   # noqa: E402
+from pstyle.cache import ParseCache   # noqa: E402
+
+
+def run(path: Path, rows: int, batch_size: int) -> float:
+    db = sqlite3.connect(path)
+    db.execute("pragma synchronous=full")
+    db.execute("create table tbl1 (id integer, val varchar)")
+    db.commit()
+    wrapped = DBWrapper(db, sqlite3.paramstyle, "named", batch_size=batch_size)
+    start = time.perf_counter()
+    for i in range(rows):
+        wrapped.execute("insert into tbl1 (id, val) values (:id, :val)", {"id": i, "val": "x"})
+        if not batch_size:
+            wrapped.commit()
+    wrapped.close()
+    return rows / (time.perf_counter() - start)
+
+
+@click.command()
+@click.option("--rows", type=int, default=2000, show_default=True)
+@click.option("--batch-size", type=int, default=100, show_default=True)
+@click.option("--parse-cache/--no-parse-cache", default=True, show_default=True)
+def main(rows, batch_size, parse_cache):
+    if parse_cache:
+        Pstyle.parse_cache = ParseCache()
+    with tempfile.TemporaryDirectory() as td:
+        click.echo(f"per-row commit: {run(Path(td) / 'row.db', rows, 0):.0f} rows/s")
+        click.echo(f"batch_size={batch_size}: {run(Path(td) / 'batch.db', rows, batch_size):.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
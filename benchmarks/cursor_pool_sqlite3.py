@@ -0,0 +1,43 @@
+"""benchmark of cursor reuse: new cursor per execute() vs cursor_pool on sqlite3
+
+usage: python benchmarks/cursor_pool_sqlite3.py [--queries 20000] [--cursor-pool 4]
+"""
+import sqlite3
+import sys
+import time
+from pathlib import Path
+import click
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))   # run without install
+from pstyle.wrapper import DBWrapper   # noqa: E402
+from pstyle.convert import Pstyle   # noqa: E402
+from pstyle.cache import ParseCache   # noqa: E402
+
+
+def run(queries: int, cursor_pool: int) -> tuple[float, dict[str, int]]:
+    db = sqlite3.connect(":memory:")
+    db.execute("create table tbl1 (id integer primary key, val varchar)")
+    db.executemany("insert into tbl1 (id, val) values (?, ?)", [(i, f"val{i}") for i in range(100)])
+    wrapped = DBWrapper(db, sqlite3.paramstyle, "named", cursor_pool=cursor_pool)
+    start = time.perf_counter()
+    for i in range(queries):
+        wrapped.execute("select val from tbl1 where id=:id", {"id": i % 100}).fetchall()
+    elapsed = time.perf_counter() - start
+    stats = wrapped.cursor_stats()
+    wrapped.close()
+    return queries / elapsed, stats
+
+
+@click.command()
+@click.option("--queries", type=int, default=20000, show_default=True)
+@click.option("--cursor-pool", type=int, default=4, show_default=True)
+@click.option("--parse-cache/--no-parse-cache", default=True, show_default=True)
+def main(queries, cursor_pool, parse_cache):
+    if parse_cache:
+        Pstyle.parse_cache = ParseCache()
+    for pool in (0, cursor_pool):
+        qps, stats = run(queries, pool)
+        click.echo(f"cursor_pool={pool}: {qps:.0f} queries/s, {stats}")
+
+
+if __name__ == "__main__":
+    main()
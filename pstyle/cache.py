@@ -0,0 +1,199 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Union
+from logging import getLogger
+import sqlparse
+from .convert import Pstyle
+
+_log = getLogger(__name__)
+
+
+class CachedCursor:
+    """cursor-like object of cached result"""
+
+    def __init__(self, description, rows: list, rowcount: int = -1):
+        self.description = description
+        self.rowcount = rowcount
+        self.arraysize = 1
+        self._rows = rows
+        self._pos = 0
+
+    def fetchone(self):
+        if self._pos >= len(self._rows):
+            return None
+        self._pos += 1
+        return self._rows[self._pos-1]
+
+    def fetchmany(self, size: Optional[int] = None):
+        if size is None:
+            size = self.arraysize
+        res = self._rows[self._pos:self._pos+size]
+        self._pos += len(res)
+        return res
+
+    def fetchall(self):
+        res = self._rows[self._pos:]
+        self._pos = len(self._rows)
+        return res
+
+    def close(self):
+        self._pos = len(self._rows)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+
+class QueryCache:
+    """SELECT result cache with TTL, LRU eviction and table-level invalidation
+
+    Entries are invalidated when a write statement to a referenced table is executed through the same wrapper.
+    Entries whose tables are not recognized (see `Pstyle.known_tables`) or reference no table are invalidated by
+    any write. Writes from other connections, by triggers or cascades, and writes to base tables of a view are not
+    detected; they are visible after `ttl` seconds.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = 60.0):
+        """
+        Args:
+            maxsize: max number of cached results
+            ttl: seconds to keep result (None: no expiration)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (expire, tables (None: any table), description, rows, rowcount)
+        self._entries: OrderedDict[Any, tuple[float, Optional[set[str]], Any, list, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @classmethod
+    def key(cls, operation: str, parameters: Union[tuple, dict]) -> Optional[tuple]:
+        """cache key of converted SQL and params (None if params are unhashable)"""
+        if isinstance(parameters, dict):
+            params = tuple(sorted(parameters.items()))
+        else:
+            params = tuple(parameters)
+        try:
+            hash(params)
+        except TypeError:
+            return None
+        return (operation, params)
+
+    def get(self, key) -> Optional[CachedCursor]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return CachedCursor(entry[2], entry[3], entry[4])
+
+    def put(self, key, operation: str, cursor) -> CachedCursor:
+        """store result of executed cursor"""
+        rows = cursor.fetchall()
+        res = CachedCursor(cursor.description, rows, cursor.rowcount)
+        expire = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+        with self._lock:
+            self._entries[key] = (expire, Pstyle.known_tables(operation) or None, res.description, rows, res.rowcount)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return res
+
+    def invalidate(self, operation: Optional[str] = None):
+        """drop entries referencing tables written by operation (None or unrecognized tables: drop all)"""
+        tables = Pstyle.known_tables(operation) if operation is not None else None
+        with self._lock:
+            if tables:
+                keys = [k for k, v in self._entries.items() if v[1] is None or v[1] & tables]
+            else:
+                keys = list(self._entries.keys())
+            for k in keys:
+                del self._entries[k]
+            self.invalidations += len(keys)
+        if keys:
+            _log.debug("invalidate %d entries: tables=%s", len(keys), tables)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries), "hits": self.hits, "misses": self.misses,
+            "invalidations": self.invalidations, "evictions": self.evictions,
+        }
+
+
+class ParseCache:
+    """LRU cache of parsed SQL for `Pstyle.parse_cache`
+
+    Only detached tokens are kept (not the parse tree). SQL longer than `max_length` is not cached,
+    and the total number of cached tokens is limited by `max_tokens`.
+    """
+
+    def __init__(self, maxsize: int = 1024, max_length: int = 4096, max_tokens: int = 200000):
+        """
+        Args:
+            maxsize: max number of cached SQL
+            max_length: max length of cached SQL
+            max_tokens: max number of tokens of all cached SQL
+        """
+        self.maxsize = maxsize
+        self.max_length = max_length
+        self.max_tokens = max_tokens
+        self._entries: OrderedDict[str, tuple[tuple[sqlparse.sql.Token, ...], ...]] = OrderedDict()
+        self._tokens = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skips = 0
+        self.evictions = 0
+
+    @classmethod
+    def parse(cls, operation: str) -> tuple[tuple[sqlparse.sql.Token, ...], ...]:
+        """flattened tokens of each statement, without reference to parse tree"""
+        return tuple(tuple(sqlparse.sql.Token(x.ttype, x.value) for x in stmt.flatten())
+                     for stmt in sqlparse.parse(operation))
+
+    def get(self, operation: str) -> tuple[tuple[sqlparse.sql.Token, ...], ...]:
+        if len(operation) > self.max_length:
+            with self._lock:
+                self.skips += 1
+            return self.parse(operation)
+        with self._lock:
+            res = self._entries.get(operation)
+            if res is not None:
+                self._entries.move_to_end(operation)
+                self.hits += 1
+                return res
+            self.misses += 1
+        res = self.parse(operation)
+        with self._lock:
+            if operation not in self._entries:
+                self._entries[operation] = res
+                self._tokens += sum(len(x) for x in res)
+            while self._entries and (len(self._entries) > self.maxsize or self._tokens > self.max_tokens):
+                _, old = self._entries.popitem(last=False)
+                self._tokens -= sum(len(x) for x in old)
+                self.evictions += 1
+        return res
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries), "tokens": self._tokens, "hits": self.hits, "misses": self.misses,
+            "skips": self.skips, "evictions": self.evictions,
+        }
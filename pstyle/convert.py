@@ -1,19 +1,187 @@
 import sqlparse
 from sqlparse.tokens import Token
-from typing import Union, Callable
+from typing import Union, Callable, Optional, TYPE_CHECKING
+import functools
 from logging import getLogger
+if TYPE_CHECKING:
+    from .cache import ParseCache
 
 _log = getLogger(__name__)
 
 dictarg_styles = ["named", "pyformat"]
-tuplearg_styles = ["qmark", "numeric", "format"]
+tuplearg_styles = ["qmark", "numeric", "format", "dollar", "binary"]
 styles = dictarg_styles + tuplearg_styles
+# placeholders which can identify the same parameter more than once
+keyed_styles = ["named", "pyformat", "numeric", "dollar", "auto"]
+# placeholders which can be referenced more than once
+shared_styles = ["named", "pyformat", "numeric", "dollar"]
+positional_placeholders = ["?", "%s", "%b"]
+# keywords followed by table name
+table_keywords = {"FROM", "INTO", "UPDATE", "TABLE", "TRUNCATE", "JOIN"}
+# UPDATE after these is not followed by table name: FOR UPDATE, DO UPDATE SET, ON DUPLICATE KEY UPDATE, THEN UPDATE
+update_skip_keywords = {"FOR", "KEY", "DO", "THEN"}
+# literals after these keywords are not parameterized
+literal_skip_keywords = {"LIMIT", "OFFSET", "FETCH", "FIRST", "NEXT", "TOP"}
+ordinal_keywords = {"ORDER BY", "GROUP BY"}
+ordinal_end_keywords = {"HAVING", "WINDOW", "LIMIT", "OFFSET", "FETCH", "UNION", "UNION ALL", "INTERSECT", "EXCEPT",
+                        "RETURNING", "FOR"}
+# literals in parenthesis after these names are type modifiers: varchar(10), numeric(10, 2)
+type_names = {"CHAR", "VARCHAR", "NCHAR", "NVARCHAR", "VARCHAR2", "NVARCHAR2", "CHARACTER", "VARYING", "NUMERIC",
+              "DECIMAL", "DEC", "NUMBER", "FLOAT", "BINARY", "VARBINARY", "BIT", "TIME", "TIMESTAMP", "DATETIME2",
+              "DATETIMEOFFSET", "RAW", "CAST"}
+from_end_keywords = {"WHERE", "GROUP BY", "ORDER BY", "HAVING", "LIMIT", "UNION", "UNION ALL", "INTERSECT",
+                     "EXCEPT", "WINDOW", "RETURNING"}
+# parameter types bound with `%b` (binary) in binary style, others use `%s`
+binary_types: tuple[type, ...] = (bytes, bytearray, memoryview)
 
 
 class Pstyle:
+    # cache of parsed SQL (None: parse every time), set `pstyle.cache.ParseCache` to enable
+    parse_cache: Optional["ParseCache"] = None
+
+    @classmethod
+    def _parse_flatten(cls, operation, binary: bool = False) -> list[list[sqlparse.sql.Token]]:
+        if cls.parse_cache is not None:
+            res = [list(x) for x in cls.parse_cache.get(operation)]
+        else:
+            res = [list(x.flatten()) for x in sqlparse.parse(operation)]
+        if binary:
+            res = [cls._merge_binary(x) for x in res]
+        return res
+
+    @classmethod
+    def statement_types(cls, operation: str) -> list[str]:
+        """statement types of SQL
+
+        Args:
+            operation: SQL statement(s)
+        Returns:
+            list of type for each statement (SELECT, INSERT, CREATE, BEGIN, ...)
+        """
+        res = []
+        for stmt in sqlparse.parse(operation):
+            typ = stmt.get_type()
+            if typ == "UNKNOWN":
+                first = stmt.token_first(skip_cm=True)
+                if first is None:
+                    continue
+                typ = first.normalized.upper()
+            res.append(typ)
+        return res
+
+    @classmethod
+    def tables(cls, operation: str) -> set[str]:
+        """table names referenced by SQL
+
+        Args:
+            operation: SQL statement(s)
+        Returns:
+            set of table name (lower case, without schema and quote)
+        """
+        return cls._tables(operation)[0]
+
+    @classmethod
+    def known_tables(cls, operation: str) -> Optional[set[str]]:
+        """table names referenced by SQL, or None if some table reference is not recognized
+
+        Keywords used as table name (`events`, `user`, ...), table functions and parenthesized table
+        references are not recognized. Views are returned as is (base tables are unknown).
+
+        Args:
+            operation: SQL statement(s)
+        Returns:
+            set of table name (lower case, without schema and quote) or None
+        """
+        res, complete = cls._tables(operation)
+        return res if complete else None
+
+    @classmethod
+    def _tables(cls, operation: str) -> tuple[set[str], bool]:
+        res = set()
+        complete = True
+        for sql in cls._parse_flatten(operation):
+            tokens = [x for x in sql if not x.is_whitespace and x.ttype not in Token.Comment]
+            state = None   # None, "expect", "name", "after"
+            name = ""
+            table_kw = ""   # keyword before table name
+            prev_kw = ""
+            depth = 0
+            from_depth = set()   # depth of parenthesis in FROM clause
+            for i, token in enumerate(tokens):
+                is_name = token.ttype in Token.Name or token.ttype == Token.Literal.String.Symbol
+                kw = token.normalized.upper() if token.ttype in Token.Keyword else ""
+                if kw:
+                    if kw == "FROM":
+                        from_depth.add(depth)
+                    elif kw in from_end_keywords:
+                        from_depth.discard(depth)
+                    if (kw in table_keywords or kw.endswith(" JOIN")) and not (
+                            kw == "UPDATE" and prev_kw in update_skip_keywords):
+                        state = "expect"
+                        table_kw = kw
+                    elif state == "expect" and kw in ("IF EXISTS", "IF NOT EXISTS", "ONLY", "TABLE"):
+                        pass
+                    elif state == "after" and kw == "AS":
+                        pass
+                    else:
+                        if state in ("expect", "name"):
+                            complete = False   # keyword as table name, LATERAL, ...
+                        state = None
+                elif is_name and state in ("expect", "name"):
+                    if state == "name":
+                        res.discard(name)
+                    name = token.value.strip('"`[]').lower()
+                    res.add(name)
+                    state = "after"
+                elif token.match(Token.Punctuation, ".") and state == "after":
+                    state = "name"   # schema.table
+                elif token.match(Token.Punctuation, ",") and depth in from_depth:
+                    state = "expect"
+                    table_kw = "FROM"
+                elif not (is_name and state == "after"):   # alias
+                    if state == "expect" and token.match(Token.Punctuation, "(") and i + 1 < len(tokens) and (
+                            tokens[i+1].ttype in (Token.Keyword.DML, Token.Keyword.CTE) or
+                            tokens[i+1].normalized.upper() == "VALUES"):
+                        pass   # subquery
+                    elif state in ("expect", "name") or (
+                            state == "after" and table_kw not in ("INTO", "TABLE") and
+                            token.match(Token.Punctuation, "(")):
+                        complete = False   # (t1), table function, ...
+                    state = None
+                prev_kw = kw
+                if token.match(Token.Punctuation, "("):
+                    depth += 1
+                elif token.match(Token.Punctuation, ")"):
+                    from_depth.discard(depth)
+                    depth -= 1
+            if state in ("expect", "name"):
+                complete = False
+        return res, complete
+
+    @classmethod
+    def _merge_binary(cls, tokens: list[sqlparse.sql.Token]) -> list[sqlparse.sql.Token]:
+        # sqlparse does not know `%b`: it is tokenized as operator `%` and name `b`
+        res: list[sqlparse.sql.Token] = []
+        for token in tokens:
+            if res and token.ttype == Token.Name and token.value == "b" and \
+                    res[-1].ttype == Token.Operator and res[-1].value == "%" and \
+                    not cls._is_operand(cls._prev_significant(res[:-1])):   # a%b is modulo
+                res[-1] = sqlparse.sql.Token(Token.Name.Placeholder, "%b")
+            else:
+                res.append(token)
+        return res
+
     @classmethod
-    def _parse_flatten(cls, operation) -> list[list[sqlparse.sql.Token]]:
-        return [list(x.flatten()) for x in sqlparse.parse(operation)]
+    def _prev_significant(cls, tokens: list[sqlparse.sql.Token]) -> Optional[sqlparse.sql.Token]:
+        for token in reversed(tokens):
+            if not token.is_whitespace and token.ttype not in Token.Comment:
+                return token
+        return None
+
+    @classmethod
+    def _is_operand(cls, token: Optional[sqlparse.sql.Token]) -> bool:
+        return token is not None and (
+            token.ttype in Token.Name or token.ttype in Token.Literal or token.match(Token.Punctuation, ")"))
 
     @classmethod
     def _do1_numeric2qmark(cls, token: sqlparse.sql.Token, from_args: tuple, to_args: list) -> str:
@@ -73,6 +241,38 @@ class Pstyle:
             return "%s"
         return token.value
 
+    @classmethod
+    def _do1_dollar2qmark(cls, token: sqlparse.sql.Token, from_args: tuple, to_args: list) -> str:
+        if token.value.startswith("$"):
+            idx = int(token.value[1:])
+            to_args.append(from_args[idx-1])   # dollar is 1-origin
+            return "?"
+        return token.value
+
+    @classmethod
+    def _do1_qmark2dollar(cls, token: sqlparse.sql.Token, from_args: tuple, to_args: list) -> str:
+        if token.value == "?":
+            to_args.append(from_args[len(to_args)])
+            return f"${len(to_args)}"   # dollar is 1-origin
+        return token.value
+
+    @classmethod
+    def _do1_binary2qmark(cls, token: sqlparse.sql.Token, from_args: tuple, to_args: list) -> str:
+        if token.value.startswith("%"):   # %s, %b
+            to_args.append(from_args[len(to_args)])
+            return "?"
+        return token.value
+
+    @classmethod
+    def _do1_qmark2binary(cls, token: sqlparse.sql.Token, from_args: tuple, to_args: list) -> str:
+        if token.value == "?":
+            value = from_args[len(to_args)]
+            to_args.append(value)
+            if isinstance(value, binary_types):
+                return "%b"
+            return "%s"
+        return token.value
+
     @classmethod
     def _do1_pyformat2named(cls, token: sqlparse.sql.Token, from_args: Union[tuple, dict], to_args: dict) -> str:
         if isinstance(from_args, dict) and token.value.startswith("%("):
@@ -127,6 +327,10 @@ class Pstyle:
                 name = token.value[1:]   # named
                 to_args.append(from_args.get(name))
                 return "?"
+        if token.value.startswith("$"):   # dollar
+            idx = int(token.value[1:])   # dollar is 1-origin
+            to_args.append(from_args[idx-1])
+            return "?"
         if token.value.startswith("%"):   # format
             to_args.append(from_args[len(to_args)])
             return "?"
@@ -136,35 +340,44 @@ class Pstyle:
         return token.value
 
     @classmethod
-    def _do1_auto2named(cls, token: sqlparse.sql.Token, from_args: Union[dict, tuple], to_args: dict) -> str:
-        iname = f"arg{len(to_args)}"
-        if token.value.startswith("%("):  # pyformat
-            name = token.value[2:].split(")")[0]
-            to_args[name] = from_args[name]
-            return f":{name}"
-        if token.value.startswith(":"):
-            try:
-                idx = int(token.value[1:])   # numeric
-                to_args[iname] = from_args[idx-1]   # numeric is 1-origin
-                return f":{iname}"
-            except ValueError:
-                name = token.value[1:]   # named
-                to_args[name] = from_args[name]
-                return f":{name}"
-        if token.value.startswith("%"):   # format
-            to_args[iname] = from_args[len(to_args)]
-            return f":{iname}"
-        if token.value == "?":   # qmark
-            to_args[iname] = from_args[len(to_args)]
-            return f":{iname}"
-        return token.value
+    def _do1_any2shared(cls, token: sqlparse.sql.Token, from_args: Union[tuple, dict], to_args: Union[list, dict],
+                        fn1: Callable, to_style: str, seen: dict, consumed: list) -> str:
+        fn1(token, from_args, consumed)
+        if token.value in positional_placeholders:
+            key = (token.value, len(consumed))   # never shared
+        else:
+            key = token.value
+        if key not in seen:
+            if isinstance(to_args, dict):
+                if token.value.startswith("%("):   # keep name of pyformat/named
+                    name = token.value[2:].split(")")[0]
+                elif token.value.startswith(":") and not token.value[1:].isdigit():
+                    name = token.value[1:]
+                else:
+                    idx = len(to_args)
+                    while f"arg{idx}" in to_args:
+                        idx += 1
+                    name = f"arg{idx}"
+                seen[key] = name
+                to_args[name] = consumed[-1]
+            else:
+                to_args.append(consumed[-1])
+                seen[key] = str(len(to_args))   # 1-origin
+        if to_style == "named":
+            return f":{seen[key]}"
+        if to_style == "pyformat":
+            return f"%({seen[key]})s"
+        if to_style == "dollar":
+            return f"${seen[key]}"
+        return f":{seen[key]}"   # numeric
 
     @classmethod
     def _do_any2any(cls, operation: str, fn1: Callable, args: Union[tuple, dict],
-                    arg_initializer=dict, normalize: bool = True) -> tuple[str, Union[tuple, dict]]:
+                    arg_initializer=dict, normalize: bool = True,
+                    binary: bool = False) -> tuple[str, Union[tuple, dict]]:
         resarg: Union[list, dict] = arg_initializer()
         resop = []
-        for sql in cls._parse_flatten(operation):
+        for sql in cls._parse_flatten(operation, binary):
             for token in sql:
                 if token.ttype == Token.Name.Placeholder:
                     resop.append(fn1(token, args, resarg))
@@ -179,36 +392,212 @@ class Pstyle:
         _log.debug("any2any: %s -> %s, arg=%s", repr(operation), repr(resop_str), resarg)
         return resop_str, resarg
 
+    @classmethod
+    def _literal_value(cls, token: sqlparse.sql.Token, prev: Optional[sqlparse.sql.Token], percent: bool = False):
+        if token.ttype == Token.Literal.Number.Integer:
+            return int(token.value)
+        if token.ttype == Token.Literal.Number.Float:
+            return float(token.value)
+        if token.ttype == Token.Literal.String.Single and token.value.startswith("'") and "\\" not in token.value:
+            if prev is not None and (prev.ttype == Token.Name.Builtin or prev.normalized.upper() == "INTERVAL"):
+                return None   # typed literal: DATE '2020-01-01', INTERVAL '1 day'
+            value = token.value[1:-1].replace("''", "'")
+            if percent:
+                value = value.replace("%%", "%")   # escaped in format/pyformat
+            return value
+        return None
+
+    @classmethod
+    def _grouped_selects(cls, tokens: list[sqlparse.sql.Token]) -> set[int]:
+        # id of SELECT token whose query has GROUP BY or DISTINCT
+        res = set()
+        for i, token in enumerate(tokens):
+            if not token.match(Token.Keyword.DML, "SELECT"):
+                continue
+            depth = 0
+            for j, tk in enumerate(tokens[i+1:]):
+                if tk.match(Token.Punctuation, "("):
+                    depth += 1
+                elif tk.match(Token.Punctuation, ")"):
+                    depth -= 1
+                    if depth < 0:
+                        break
+                elif depth == 0 and tk.ttype in Token.Keyword:
+                    kw = tk.normalized.upper()
+                    if kw == "GROUP BY" or (j == 0 and kw.startswith("DISTINCT")):
+                        res.add(id(token))
+                        break
+                    if kw in ("UNION", "UNION ALL", "INTERSECT", "EXCEPT") or tk.ttype == Token.Keyword.DML:
+                        break
+        return res
+
+    @classmethod
+    def parameterize(cls, from_style: str, operation: str, args: Union[tuple, dict] = ()) -> tuple[
+            str, Union[tuple, dict]]:
+        """replace numeric and string literals in DML with placeholders of from_style
+
+        Literals of LIMIT/OFFSET/FETCH/TOP, ORDER BY/GROUP BY ordinals, typed literals and literals in CAST(...)
+        or type modifiers (`varchar(10)`, `::numeric(10, 2)`) are kept.
+        In a query with GROUP BY or DISTINCT, literals of select list, GROUP BY, HAVING and ORDER BY are kept,
+        because expressions in these clauses must match (`SELECT a+1 ... GROUP BY a+1`).
+        Non-DML statements (CREATE, DROP, ...) are kept as is.
+        `%%` in string literals is unescaped for format/pyformat/binary (and auto with `%` placeholders).
+        auto with tuple args: literals become positional placeholders if SQL has positional placeholders only,
+        numbered (`:n`) placeholders if SQL has numbered placeholders only, and ValueError is raised if both.
+
+        Args:
+            from_style: [qmark|format|numeric|named|pyformat|dollar|binary|auto]
+            operation: SQL statement with placeholder
+            args: argument to placeholder
+        Returns:
+            result_sql, result_args
+        """
+        resarg: Union[list, dict] = dict(args) if isinstance(args, dict) else list(args)
+        resop = []
+        pos = 0   # number of positional placeholders
+        lit = 0
+        parsed = cls._parse_flatten(operation, from_style in ("binary", "auto"))
+        numbered = False
+        percent = from_style in ("format", "pyformat", "binary")
+        if from_style == "auto":
+            placeholders = [x.value for sql in parsed for x in sql if x.ttype == Token.Name.Placeholder]
+            percent = any(x.startswith("%") for x in placeholders)
+            if not isinstance(args, dict):
+                numbered = any(x[0] in ":$" and x[1:].isdigit() for x in placeholders)
+                if numbered and any(not (x[0] in ":$" and x[1:].isdigit()) for x in placeholders):
+                    raise ValueError("cannot parameterize auto SQL with both numbered and positional placeholders")
+        for sql in parsed:
+            significant = [x for x in sql if not x.is_whitespace and x.ttype not in Token.Comment]
+            dml = bool(significant) and significant[0].ttype in (Token.Keyword.DML, Token.Keyword.CTE)
+            grouped = cls._grouped_selects(significant) if dml else set()
+            query: dict[int, bool] = {}   # depth of parenthesis -> query is grouped
+            keep: dict[int, bool] = {}   # depth of parenthesis -> in clause of grouped query whose literals are kept
+            prev: Optional[sqlparse.sql.Token] = None
+            prev2: Optional[sqlparse.sql.Token] = None
+            raw_prev: Optional[sqlparse.sql.Token] = None
+            skip = False   # in LIMIT/OFFSET
+            ordinal: set[int] = set()   # depth of parenthesis in ORDER BY/GROUP BY
+            parens: list[bool] = []   # parenthesis is CAST or type modifier
+            for token in sql:
+                if token.is_whitespace or token.ttype in Token.Comment:
+                    resop.append(token.value)
+                    raw_prev = token
+                    continue
+                value = None
+                kw = token.normalized.upper() if token.ttype in Token.Keyword or token.ttype == Token.Name else None
+                if kw in literal_skip_keywords:
+                    skip = True
+                elif token.ttype in Token.Literal or token.match(Token.Punctuation, ","):
+                    pass
+                else:
+                    skip = False
+                if kw in ordinal_keywords:
+                    ordinal.add(len(parens))
+                elif kw in ordinal_end_keywords and token.ttype in Token.Keyword:
+                    ordinal.discard(len(parens))
+                if token.ttype == Token.Keyword.DML and kw == "SELECT":
+                    query[len(parens)] = id(token) in grouped
+                    keep[len(parens)] = query[len(parens)]   # select list
+                elif query.get(len(parens)) and token.ttype in Token.Keyword:
+                    if kw in ("FROM", "WHERE"):
+                        keep[len(parens)] = False
+                    elif kw in ("GROUP BY", "HAVING", "ORDER BY"):
+                        keep[len(parens)] = True
+                if token.match(Token.Punctuation, "("):
+                    parens.append(prev is not None and prev.ttype == Token.Name and (
+                        prev.normalized.upper() in type_names or (prev2 is not None and (
+                            prev2.match(Token.Punctuation, "::") or prev2.match(Token.Keyword, "AS")))))
+                elif token.match(Token.Punctuation, ")"):
+                    ordinal.discard(len(parens))   # end of subquery
+                    query.pop(len(parens), None)
+                    keep.pop(len(parens), None)
+                    if parens:
+                        parens.pop()
+                if token.ttype == Token.Name.Placeholder:
+                    pos += 1
+                elif dml and not skip and not any(parens) and not keep.get(
+                        max((x for x in keep if x <= len(parens)), default=-1), False) and not (
+                        len(parens) in ordinal and token.ttype == Token.Literal.Number.Integer and
+                        prev is not None and (
+                            prev.match(Token.Punctuation, ",") or prev.normalized.upper() in ordinal_keywords)) and \
+                        not (token.ttype in Token.Literal.String and raw_prev is not None and
+                             raw_prev.ttype == Token.Name):   # E'...', N'...'
+                    value = cls._literal_value(token, prev, percent)
+                if value is None:
+                    resop.append(token.value)
+                    prev, prev2 = token, prev
+                    raw_prev = token
+                    continue
+                if token.value[0] in "+-" and prev is not None and (
+                        prev.ttype in Token.Name or prev.ttype in Token.Literal or prev.match(Token.Punctuation, ")")):
+                    resop.append(token.value[0])   # binary operator: a-1
+                    value = abs(value)
+                if isinstance(resarg, dict):
+                    while f"lit{lit}" in resarg:
+                        lit += 1
+                    name = f"lit{lit}"
+                    resarg[name] = value
+                    resop.append(f"%({name})s" if from_style == "pyformat" else f":{name}")
+                elif from_style in ("numeric", "named", "dollar") or numbered:
+                    resarg.append(value)
+                    resop.append(f"{'$' if from_style == 'dollar' else ':'}{len(resarg)}")
+                else:
+                    resarg.insert(pos, value)
+                    pos += 1
+                    resop.append("?" if from_style in ("qmark", "auto") else "%s")
+                prev, prev2 = token, prev
+                raw_prev = token
+        if isinstance(resarg, list):
+            resarg = tuple(resarg)
+        resop_str = "".join(resop)
+        _log.debug("parameterize: %s -> %s, arg=%s", repr(operation), repr(resop_str), resarg)
+        return resop_str, resarg
+
     @classmethod
     def convert(cls, from_style: str, to_style: str, operation: str, args: Union[tuple, dict] = (),
-                normalize: bool = True) -> tuple[str, Union[tuple, dict]]:
+                normalize: bool = True, parameterize: bool = False) -> tuple[str, Union[tuple, dict]]:
         """convert paramstyle
 
         Args:
-            from_style: [qmark|format|numeric|named|pyformat|auto]
-            to_style: [qmark|format|numeric|named|pyformat]
+            from_style: [qmark|format|numeric|named|pyformat|dollar|binary|auto]
+            to_style: [qmark|format|numeric|named|pyformat|dollar|binary]
             operation: SQL statement with placeholder
             args: argument to placeholder
             normalize: output is normalized or not
+            parameterize: replace literals with placeholders (see `Pstyle.parameterize`)
         Returns:
             result_sql, result_args
         """
+        if parameterize:
+            operation, args = cls.parameterize(from_style, operation, args)
         if from_style == to_style:
             return operation, args
+        binary = from_style in ("binary", "auto")
         if hasattr(cls, f"_do1_{from_style}2{to_style}"):
             fn = getattr(cls, f"_do1_{from_style}2{to_style}")
             if callable(fn):
                 if to_style in dictarg_styles:
                     _log.debug("do1(dict): %s to %s", from_style, to_style)
-                    return cls._do_any2any(operation, fn, args, dict, normalize)
+                    return cls._do_any2any(operation, fn, args, dict, normalize, binary)
                 else:
                     _log.debug("do1(tuple): %s to %s", from_style, to_style)
-                    return cls._do_any2any(operation, fn, args, list, normalize)
+                    return cls._do_any2any(operation, fn, args, list, normalize, binary)
+        elif from_style in keyed_styles and to_style in shared_styles and hasattr(cls, f"_do1_{from_style}2qmark"):
+            # repeated parameters share one placeholder instead of expanding via qmark
+            fn = functools.partial(
+                cls._do1_any2shared, fn1=getattr(cls, f"_do1_{from_style}2qmark"), to_style=to_style,
+                seen={}, consumed=[])
+            if to_style in dictarg_styles:
+                _log.debug("do1-s(dict): %s to %s", from_style, to_style)
+                return cls._do_any2any(operation, fn, args, dict, normalize, binary)
+            else:
+                _log.debug("do1-s(tuple): %s to %s", from_style, to_style)
+                return cls._do_any2any(operation, fn, args, list, normalize, binary)
         elif hasattr(cls, f"_do1_{from_style}2qmark") and hasattr(cls, f"_do1_qmark2{to_style}"):
             fn1 = getattr(cls, f"_do1_{from_style}2qmark")
             fn2 = getattr(cls, f"_do1_qmark2{to_style}")
             if callable(fn1) and callable(fn2):
-                op, a = cls._do_any2any(operation, fn1, args, list, normalize)
+                op, a = cls._do_any2any(operation, fn1, args, list, normalize, binary)
                 _log.debug("qmark1: op=%s, arg=%s", op, a)
                 if to_style in dictarg_styles:
                     _log.debug("do1-q(dict): %s to %s", from_style, to_style)
@@ -1,12 +1,11 @@
 import click
 import functools
 import json
-from urllib.parse import urlparse
 from typing import Any
 from logging import getLogger
 from .version import VERSION
 from .convert import Pstyle, styles
-from .load_drivers import dbapis
+from .load_drivers import dbapis, connect
 
 _log = getLogger(__name__)
 
@@ -41,15 +40,16 @@ def verbose_option(func):
 @click.option("--args", multiple=True)
 @click.option("--kwargs", type=str, help="json")
 @click.option("--normalize/--original", default=True, show_default=True)
+@click.option("--parameterize/--literal", default=False, show_default=True, help="replace literals with placeholders")
 @click.argument("operation")
-def convert(operation, args, kwargs, from_style, to_style, normalize):
+def convert(operation, args, kwargs, from_style, to_style, normalize, parameterize):
     """convert SQL and params with specified paramstyle"""
     if kwargs:
         conv_arg: dict[str, Any] = json.loads(kwargs)
     else:
         conv_arg: tuple[str] = tuple(args)
     _log.debug("SQL(before): %s, args=%s", operation, conv_arg)
-    result_op, result_args = Pstyle.convert(from_style, to_style, operation, conv_arg, normalize)
+    result_op, result_args = Pstyle.convert(from_style, to_style, operation, conv_arg, normalize, parameterize)
     _log.debug("SQL(after): %s, args=%s", result_op, result_args)
     click.echo(f"op: {result_op}")
     click.echo(f"args: {result_args}")
@@ -78,11 +78,10 @@ def try_db(dsn, style, normalize, ipython):
         import readline  # noqa
         import code
     from .wrapper import DBWrapper
-    parsed = urlparse(dsn)
-    if parsed.scheme not in dbapis:
-        raise click.BadArgumentUsage(f"{parsed.scheme} not found in {list(dbapis.keys())}")
-    paramstyle, connector = dbapis.get(parsed.scheme)
-    db = connector(parsed)
+    try:
+        paramstyle, db = connect(dsn)
+    except ValueError as e:
+        raise click.BadArgumentUsage(str(e))
     wrapped = DBWrapper(db, paramstyle, style, normalize)
     click.echo(f"db({paramstyle}): db.execute(...)")
     click.echo(f"wrapped({style}): wrapped.execute(...)")
@@ -93,5 +92,19 @@ def try_db(dsn, style, normalize, ipython):
         code.InteractiveConsole(locals=names).interact()
 
 
+@cli.command()
+@verbose_option
+@click.option("--unix", type=click.Path(), help="unix socket path")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8765, show_default=True)
+@click.option("--workers", type=int, default=0, show_default=True, help="number of worker processes")
+@click.option("--limit", type=int, default=16 * 1024 * 1024, show_default=True, help="max bytes of a request line")
+def serve(unix, host, port, workers, limit):
+    """serve conversion with newline-delimited JSON"""
+    import asyncio
+    from .server import ConvertServer
+    asyncio.run(ConvertServer(workers, limit).serve(unix, host, port))
+
+
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Optional
+from logging import getLogger
+from .convert import Pstyle
+from .cache import ParseCache
+
+_log = getLogger(__name__)
+
+
+def _init_worker():
+    Pstyle.parse_cache = ParseCache()
+
+
+def convert_request(req: dict) -> dict:
+    """process one conversion request
+
+    Args:
+        req: {"from_style", "to_style", "operation", "args", "normalize", "parameterize"}
+    Returns:
+        {"operation", "args"} or {"error"}
+    """
+    try:
+        args = req.get("args", [])
+        if isinstance(args, list):
+            args = tuple(args)
+        op, a = Pstyle.convert(
+            req.get("from_style", "auto"), req["to_style"], req["operation"], args,
+            req.get("normalize", True), req.get("parameterize", False))
+        if isinstance(a, tuple):
+            a = list(a)
+        return {"operation": op, "args": a}
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+class ConvertServer:
+    """newline-delimited JSON conversion server
+
+    Each line is a request object and each response is written in the order of requests on the connection.
+    `{"command": "stats"}` returns statistics. The value of "id" in the request is copied to the response.
+    A line longer than `limit` is discarded and answered with an error.
+    Parsed SQL is cached by `Pstyle.parse_cache` in the server process (workers=0) or in each worker process.
+    """
+
+    def __init__(self, workers: int = 0, limit: int = 16 * 1024 * 1024):
+        """
+        Args:
+            workers: number of worker processes (0: convert in the server process)
+            limit: max bytes of a request line
+        """
+        self.workers = workers
+        self.limit = limit
+        self._executor: Optional[Executor] = None
+        self.cache: Optional[ParseCache] = None
+        self._prev_cache: Optional[ParseCache] = None
+        if workers:
+            # fork from running event loop and executor threads is unsafe
+            self._executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=_init_worker)
+        self.started = time.time()
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+
+    def stats(self) -> dict[str, Any]:
+        res = {
+            "uptime": time.time() - self.started, "workers": self.workers, "connections": self.connections,
+            "requests": self.requests, "errors": self.errors,
+        }
+        if self.cache is not None:   # workers keep their own cache
+            res["cache"] = self.cache.stats()
+        return res
+
+    async def process(self, line: bytes) -> dict:
+        self.requests += 1
+        try:
+            req = json.loads(line)
+            if not isinstance(req, dict):
+                raise ValueError("request is not an object")
+        except ValueError as e:
+            res = {"error": f"invalid request: {e}"}
+        else:
+            if req.get("command", "convert") == "stats":
+                res = {"stats": self.stats()}
+            elif req.get("command", "convert") != "convert":
+                res = {"error": f"invalid command: {req.get('command')}"}
+            elif self._executor is None:
+                res = convert_request(req)
+            else:
+                res = await asyncio.get_running_loop().run_in_executor(self._executor, convert_request, req)
+            if "id" in req:
+                res["id"] = req["id"]
+        if "error" in res:
+            self.errors += 1
+        return res
+
+    async def reject(self, error: str) -> dict:
+        self.requests += 1
+        self.errors += 1
+        return {"error": error}
+
+    @classmethod
+    async def readline(cls, reader: asyncio.StreamReader) -> Optional[bytes]:
+        """read one line (b"": EOF, None: the line exceeds limit of reader and is discarded)"""
+        try:
+            return await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            return e.partial
+        except asyncio.LimitOverrunError as e:
+            consumed = e.consumed
+        while True:
+            # drop buffered part of the line and wait for the rest
+            await reader.readexactly(consumed)
+            try:
+                await reader.readuntil(b"\n")
+                return None
+            except asyncio.IncompleteReadError:
+                return None
+            except asyncio.LimitOverrunError as e:
+                consumed = e.consumed
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        responses: asyncio.Queue = asyncio.Queue()
+
+        async def write_responses():
+            while True:
+                fut = await responses.get()
+                if fut is None:
+                    break
+                writer.write(json.dumps(await fut).encode() + b"\n")
+                if responses.empty():
+                    await writer.drain()
+
+        writer_task = asyncio.create_task(write_responses())
+        try:
+            while (line := await self.readline(reader)) != b"":
+                if line is None:
+                    await responses.put(asyncio.ensure_future(
+                        self.reject(f"request too long: exceeds {self.limit} bytes")))
+                elif line.strip():
+                    # pipelined: read next request while converting
+                    await responses.put(asyncio.ensure_future(self.process(line)))
+            await responses.put(None)
+            await writer_task
+        except ConnectionError:
+            # client disconnected
+            _log.debug("connection closed by client")
+        except asyncio.CancelledError:
+            # server shutdown
+            writer_task.cancel()
+            raise
+        finally:
+            if not writer_task.done():
+                writer_task.cancel()
+            writer.close()
+
+    async def start(self, unix: Optional[str] = None, host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+        if not self.workers and self.cache is None:
+            self._prev_cache = Pstyle.parse_cache
+            self.cache = Pstyle.parse_cache = ParseCache()
+        if unix:
+            server = await asyncio.start_unix_server(self.handle, path=unix, limit=self.limit)
+        else:
+            server = await asyncio.start_server(self.handle, host=host, port=port, limit=self.limit)
+        _log.info("listening: %s", [x.getsockname() for x in server.sockets])
+        return server
+
+    async def serve(self, unix: Optional[str] = None, host: str = "127.0.0.1", port: int = 0):
+        server = await self.start(unix, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+        if self.cache is not None and Pstyle.parse_cache is self.cache:
+            Pstyle.parse_cache = self._prev_cache
+        self.cache = None
@@ -1,53 +1,518 @@
+import functools
+import itertools
+import threading
+import time
+from typing import Optional
+from sqlparse.tokens import Token
 from .convert import Pstyle
+from .cache import QueryCache
+
+
+begin_types = {"BEGIN", "START"}
+end_types = {"COMMIT", "ROLLBACK", "END"}
+# keywords of DML which returns result set
+result_keywords = {"RETURNING", "OUTPUT"}
+# SELECT with these keywords writes or locks rows: SELECT ... INTO, LOCK IN SHARE MODE, WITH (UPDLOCK)
+lock_keywords = {"INTO", "LOCK", "UPDLOCK", "XLOCK", "HOLDLOCK", "TABLOCKX"}
+# classification of SQL longer than this is not memoized
+memo_max_length = 4096
+
+
+def _memoize(fn):
+    cached = functools.lru_cache(maxsize=256)(fn)
+
+    @functools.wraps(fn)
+    def wrapper(operation):
+        if len(operation) > memo_max_length:
+            return fn(operation)
+        return cached(operation)
+    return wrapper
+
+
+@_memoize
+def _statement_types(operation) -> tuple[str, ...]:
+    return tuple(Pstyle.statement_types(operation))
+
+
+@_memoize
+def _has_result_keyword(operation) -> bool:
+    return any(x.ttype in Token.Keyword and x.normalized.upper() in result_keywords
+               for sql in Pstyle._parse_flatten(operation) for x in sql)
+
+
+@_memoize
+def _is_read(operation) -> bool:
+    """SELECT without row lock, SELECT INTO and data-modifying CTE"""
+    types = _statement_types(operation)
+    if not types or any(x != "SELECT" for x in types):
+        return False
+    for sql in Pstyle._parse_flatten(operation):
+        prev = ""
+        for token in sql:
+            if token.is_whitespace or token.ttype in Token.Comment:
+                continue
+            word = token.normalized.upper()
+            if token.ttype == Token.Keyword.DML and word != "SELECT":
+                return False   # FOR UPDATE, WITH d AS (DELETE ...) SELECT
+            if (token.ttype in Token.Keyword or token.ttype in Token.Name) and word in lock_keywords:
+                return False
+            if prev == "FOR" and word in ("SHARE", "KEY"):
+                return False   # FOR SHARE, FOR KEY SHARE
+            prev = word if token.ttype in Token.Keyword else ""
+    return True
 
 
 class CursorWrapper:
-    """wrapper of DB cursor object"""
+    """wrapper of DB cursor object
+
+    A cursor of DBWrapper executes buffered writes of the DBWrapper before its own statement.
+    """
 
-    def __init__(self, cursor, orig_paramstyle: str, paramstyle: str, normalize: bool = True):
+    def __init__(self, cursor, orig_paramstyle: str, paramstyle: str, normalize: bool = True,
+                 cache: Optional[QueryCache] = None, parameterize: bool = False, owner: Optional["DBWrapper"] = None):
         self._cursor = cursor
         self._orig_paramstyle = orig_paramstyle
         self._paramstyle = paramstyle
         self.normalize = normalize
+        self._cache = cache
+        self.parameterize = parameterize
+        self._owner = owner
+
+    def _convert(self, operation, parameters):
+        return Pstyle.convert(self._paramstyle, self._orig_paramstyle, operation, parameters, self.normalize,
+                              self.parameterize)
+
+    def _invalidate(self, operation):
+        if self._cache is not None and not _is_read(operation):
+            self._cache.invalidate(operation)
 
     def execute(self, operation, parameters=()):
-        op, a = Pstyle.convert(self._paramstyle, self._orig_paramstyle, operation, parameters, self.normalize)
-        return self._cursor.execute(op, a)
+        op, a = self._convert(operation, parameters)
+        if self._owner is not None:
+            self._owner._write_pending()
+        try:
+            return self._cursor.execute(op, a)
+        finally:
+            self._invalidate(op)
 
     def executemany(self, operation, seq_of_parameters=[]):
+        if self._owner is not None:
+            self._owner._write_pending()
         op = None
         sop = []
         for p in seq_of_parameters:
-            op1, p1 = Pstyle.convert(self._paramstyle, self._orig_paramstyle, operation, p, self.normalize)
+            op1, p1 = self._convert(operation, p)
             if op is None:
                 op = op1
             assert op == op1
             sop.append(p1)
-        if op is None:
-            return self._cursor.executemany(operation, seq_of_parameters)
-        return self._cursor.executemany(op, sop)
+        try:
+            if op is None:
+                return self._cursor.executemany(operation, seq_of_parameters)
+            return self._cursor.executemany(op, sop)
+        finally:
+            self._invalidate(operation)
 
     def __getattr__(self, name):
         return getattr(self._cursor, name)
 
 
+class PooledCursor(CursorWrapper):
+    """cursor wrapper which returns DB cursor to the pool of DBWrapper when result is consumed or closed
+
+    A DB cursor closed with unread rows is closed instead of returned to the pool, because server-side or
+    unbuffered cursors cannot execute again until the result is read.
+    After returning, description/rowcount/lastrowid of the last execution are still readable and fetch returns nothing.
+    """
+
+    snapshot_attrs = ("description", "rowcount", "lastrowid")
+
+    def __init__(self, owner: "DBWrapper", cursor):
+        super().__init__(cursor, owner._orig_paramstyle, owner.paramstyle, owner.normalize, owner.cache,
+                         owner.parameterize, owner)
+        self._snapshot: dict = {}
+
+    def _release(self, reuse: bool = True):
+        if self._cursor is None:
+            return
+        self._snapshot = {k: getattr(self._cursor, k, None) for k in self.snapshot_attrs}
+        cursor, self._cursor = self._cursor, None
+        if reuse:
+            self._owner._release(cursor)
+        else:
+            cursor.close()
+
+    def execute(self, operation, parameters=()):
+        if self._cursor is None:
+            self._cursor = self._owner._acquire()
+        try:
+            super().execute(operation, parameters)
+        except Exception:
+            self._release()
+            raise
+        if self._cursor.description is None:   # no result set
+            self._release()
+        return self
+
+    def executemany(self, operation, seq_of_parameters=[]):
+        if self._cursor is None:
+            self._cursor = self._owner._acquire()
+        try:
+            super().executemany(operation, seq_of_parameters)
+        finally:
+            self._release()
+        return self
+
+    def fetchone(self):
+        if self._cursor is None:
+            return None
+        res = self._cursor.fetchone()
+        if res is None:
+            self._release()
+        return res
+
+    def fetchmany(self, size: Optional[int] = None):
+        if self._cursor is None:
+            return []
+        if size is None:
+            size = self._cursor.arraysize
+        res = self._cursor.fetchmany(size)
+        if len(res) < size:
+            self._release()
+        return res
+
+    def fetchall(self):
+        if self._cursor is None:
+            return []
+        res = self._cursor.fetchall()
+        self._release()
+        return res
+
+    def close(self):
+        # result is not consumed (consumed result has been released by execute/fetch)
+        self._release(reuse=False)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, name):
+        if self._cursor is None:
+            if name in self._snapshot:
+                return self._snapshot[name]
+            raise AttributeError(f"cursor is returned to pool: {name}")
+        return getattr(self._cursor, name)
+
+
 class DBWrapper:
-    """wrapper of DB connection object"""
+    """wrapper of DB connection object
+
+    Write batching (batch_size > 0): execute() of INSERT/UPDATE/DELETE/REPLACE (without RETURNING/OUTPUT)
+    is buffered and returns None.
+    Consecutive writes with the same converted SQL are executed together by executemany(), and commit is issued
+    once per batch_size writes or batch_interval seconds (checked on the next execute(), no background thread).
+    Buffered writes are executed before any other statement of this wrapper and its cursors, so the connection
+    reads its own writes (statements on the raw connection or its cursors do not execute them).
+    Inside an explicit transaction (BEGIN/START executed by execute()), automatic commit is paused until
+    COMMIT/ROLLBACK, commit() or rollback().
+    Durability: a write is durable only after flush()/commit()/close() or the automatic commit;
+    buffered and uncommitted writes are lost on crash, and errors of buffered writes are raised by a later call.
+    If execute() is not called, batch_interval does not commit anything.
+    """
+
+    batch_types = {"INSERT", "UPDATE", "DELETE", "REPLACE"}
 
-    def __init__(self, db, orig_paramstyle: str, paramstyle: str, normalize: bool = True):
+    def __init__(self, db, orig_paramstyle: str, paramstyle: str, normalize: bool = True,
+                 cache: Optional[QueryCache] = None, cursor_pool: int = 0, parameterize: bool = False,
+                 batch_size: int = 0, batch_interval: Optional[float] = None):
+        """
+        Args:
+            db: DB connection
+            orig_paramstyle: paramstyle of DB connection
+            paramstyle: paramstyle of SQL passed to this wrapper
+            normalize: output is normalized or not
+            cache: cache SELECT results of execute() (invalidated by writes through this wrapper)
+            cursor_pool: max number of idle cursors reused by execute()/executemany() (0: no reuse)
+            parameterize: replace literals in SQL with placeholders (see `Pstyle.parameterize`)
+            batch_size: number of writes per commit in write batching mode (0: no batching)
+            batch_interval: max seconds to keep uncommitted writes in write batching mode
+        """
         self._db = db
         self.paramstyle = paramstyle
         self._orig_paramstyle = orig_paramstyle
         self.normalize = normalize
+        self.cache = cache
+        self.cursor_pool = cursor_pool
+        self.parameterize = parameterize
+        self._idle: list = []
+        self._idle_lock = threading.Lock()
+        self.cursors_created = 0
+        self.cursors_reused = 0
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self._pending_op: Optional[str] = None
+        self._pending_args: list = []
+        self._uncommitted = 0
+        self._batch_start = 0.0
+        self._explicit = False   # in explicit transaction
+        self.batches = 0
+        self.commits = 0
+
+    def _acquire(self):
+        with self._idle_lock:
+            if self._idle:
+                self.cursors_reused += 1
+                return self._idle.pop()
+            self.cursors_created += 1
+        return self._db.cursor()
+
+    def _release(self, cursor):
+        with self._idle_lock:
+            if len(self._idle) < self.cursor_pool:
+                self._idle.append(cursor)
+                return
+        cursor.close()
+
+    def _write_pending(self):
+        if self._pending_op is None:
+            return
+        op, args = self._pending_op, self._pending_args
+        self._pending_op, self._pending_args = None, []
+        cur = self._acquire()
+        try:
+            cur.executemany(op, args)
+        finally:
+            self._release(cur)
+            if self.cache is not None:
+                self.cache.invalidate(op)
+        self.batches += 1
+
+    def _batch(self, op, a):
+        if self._pending_op != op:
+            self._write_pending()
+            self._pending_op = op
+        if self._uncommitted == 0:
+            self._batch_start = time.monotonic()
+        self._pending_args.append(a)
+        self._uncommitted += 1
+        if self._explicit:
+            if len(self._pending_args) >= self.batch_size:
+                self._write_pending()
+        elif self._uncommitted >= self.batch_size:
+            self.flush()
+
+    def _flush_if_due(self):
+        if self._uncommitted and not self._explicit and self.batch_interval is not None and \
+                time.monotonic() - self._batch_start >= self.batch_interval:
+            self.flush()
+
+    def flush(self):
+        """execute buffered writes and commit (no commit in explicit transaction)"""
+        self._write_pending()
+        if self._uncommitted and not self._explicit:
+            self._uncommitted = 0
+            self.commits += 1
+            self._db.commit()
+
+    def commit(self):
+        self._write_pending()
+        self._uncommitted = 0
+        self._explicit = False
+        self.commits += 1
+        return self._db.commit()
 
     def cursor(self):
-        return CursorWrapper(self._db.cursor(), self._orig_paramstyle, self.paramstyle, self.normalize)
+        self._write_pending()
+        with self._idle_lock:
+            self.cursors_created += 1
+        return CursorWrapper(self._db.cursor(), self._orig_paramstyle, self.paramstyle, self.normalize, self.cache,
+                             self.parameterize, self)
 
     def execute(self, operation, parameters=()):
+        if self.batch_size:
+            self._flush_if_due()
+            op, a = Pstyle.convert(self.paramstyle, self._orig_paramstyle, operation, parameters, self.normalize,
+                                   self.parameterize)
+            types = _statement_types(op)
+            if len(types) == 1 and types[0] in self.batch_types and not _has_result_keyword(op):
+                self._batch(op, a)
+                return None
+            self._write_pending()
+            if types and types[0] in begin_types:
+                self._explicit = True
+            if types and types[-1] in end_types:
+                self._explicit = False
+                self._uncommitted = 0
+        if self.cache is not None:
+            op, a = Pstyle.convert(self.paramstyle, self._orig_paramstyle, operation, parameters, self.normalize,
+                                   self.parameterize)
+            key = self.cache.key(op, a)
+            if key is not None and _is_read(op):
+                res = self.cache.get(key)
+                if res is not None:
+                    return res
+                cur = self._acquire()
+                try:
+                    cur.execute(op, a)
+                    return self.cache.put(key, op, cur)
+                finally:
+                    self._release(cur)
+        if self.cursor_pool:
+            return PooledCursor(self, self._acquire()).execute(operation, parameters)
         return self.cursor().execute(operation, parameters)
 
     def executemany(self, operation, set_of_parameters=[]):
+        self._write_pending()
+        if self.cursor_pool:
+            return PooledCursor(self, self._acquire()).executemany(operation, set_of_parameters)
         return self.cursor().executemany(operation, set_of_parameters)
 
+    def rollback(self):
+        if self.cache is not None:
+            # results read inside the transaction may be discarded
+            self.cache.invalidate()
+        # buffered writes are discarded
+        self._pending_op, self._pending_args = None, []
+        self._uncommitted = 0
+        self._explicit = False
+        return self._db.rollback()
+
+    def cursor_stats(self) -> dict[str, int]:
+        return {"created": self.cursors_created, "reused": self.cursors_reused, "idle": len(self._idle)}
+
+    def batch_stats(self) -> dict[str, int]:
+        return {"pending": len(self._pending_args), "uncommitted": self._uncommitted,
+                "batches": self.batches, "commits": self.commits}
+
+    def close(self):
+        self.flush()
+        with self._idle_lock:
+            idle, self._idle = self._idle, []
+        for cursor in idle:
+            cursor.close()
+        return self._db.close()
+
     def __getattr__(self, name):
         return getattr(self._db, name)
+
+
+class RouterWrapper:
+    """read/write-splitting wrapper of primary and replica DB connections
+
+    SELECT goes to replicas, others go to primary. SELECT which locks or writes (FOR UPDATE/SHARE, SELECT INTO,
+    data-modifying CTE) also goes to primary.
+    After BEGIN/START, all statements of the thread go to primary until commit()/rollback() (or COMMIT/ROLLBACK).
+    After a write, the same applies when pin_writes is True, so the thread reads its own writes.
+    The pin is kept per thread, and commit()/rollback() release the pin of the calling thread only.
+    """
+
+    begin_types = begin_types
+    end_types = end_types
+
+    def __init__(self, primary, replicas: list, orig_paramstyle: Optional[str] = None, paramstyle: str = "auto",
+                 normalize: bool = True, balance: str = "roundrobin", parameterize: bool = False,
+                 pin_writes: bool = True):
+        """
+        Args:
+            primary: DB connection or DSN
+            replicas: list of DB connection or DSN
+            orig_paramstyle: paramstyle of DB connections (not required for DSN)
+            paramstyle: paramstyle of SQL passed to this wrapper
+            normalize: output is normalized or not
+            balance: [roundrobin|least] replica selection
+            parameterize: replace literals in SQL with placeholders (see `Pstyle.parameterize`)
+            pin_writes: pin the thread to primary after a write until commit/rollback
+                (False for autocommit connections, which never commit through this wrapper)
+        """
+        if balance not in ("roundrobin", "least"):
+            raise ValueError(f"invalid balance: {balance}")
+        self.paramstyle = paramstyle
+        self.normalize = normalize
+        self.balance = balance
+        self.parameterize = parameterize
+        self.pin_writes = pin_writes
+        self._primary = self._wrap(primary, orig_paramstyle)
+        self._replicas = [self._wrap(x, orig_paramstyle) for x in replicas]
+        self.backends = ["primary"] + [f"replica{i}" for i in range(len(self._replicas))]
+        self.counts: dict[str, int] = {x: 0 for x in self.backends}
+        self._outstanding: dict[str, int] = {x: 0 for x in self.backends}
+        self._next = itertools.cycle(range(len(self._replicas)))
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def in_transaction(self) -> bool:
+        """statements of current thread are pinned to primary"""
+        return getattr(self._local, "pinned", False)
+
+    @in_transaction.setter
+    def in_transaction(self, value: bool):
+        self._local.pinned = value
+
+    def _wrap(self, db, orig_paramstyle: Optional[str]) -> DBWrapper:
+        if isinstance(db, str):
+            from .load_drivers import connect
+            orig_paramstyle, db = connect(db)
+        if orig_paramstyle is None:
+            raise ValueError("orig_paramstyle is required for DB connection")
+        return DBWrapper(db, orig_paramstyle, self.paramstyle, self.normalize, parameterize=self.parameterize)
+
+    def _select(self, operation) -> tuple[str, DBWrapper]:
+        types = _statement_types(operation)
+        read = _is_read(operation)
+        if types and types[0] in self.begin_types:
+            self.in_transaction = True   # explicit transaction
+        elif self.pin_writes and not read and any(x not in self.end_types for x in types):
+            self.in_transaction = True   # implicit transaction of DB-API opened by write
+        with self._lock:
+            if self.in_transaction or not self._replicas or not read:
+                name, db = "primary", self._primary
+            else:
+                if self.balance == "least":
+                    low = min(self._outstanding[f"replica{i}"] for i in range(len(self._replicas)))
+                    # round-robin among the least loaded replicas
+                    idx = next(x for x in self._next if self._outstanding[f"replica{x}"] == low)
+                else:
+                    idx = next(self._next)
+                name, db = f"replica{idx}", self._replicas[idx]
+            self.counts[name] += 1
+            self._outstanding[name] += 1
+        if types and types[-1] in self.end_types:
+            self.in_transaction = False
+        return name, db
+
+    def _done(self, name: str):
+        with self._lock:
+            self._outstanding[name] -= 1
+
+    def cursor(self):
+        """cursor of primary connection"""
+        return self._primary.cursor()
+
+    def execute(self, operation, parameters=()):
+        name, db = self._select(operation)
+        try:
+            return db.execute(operation, parameters)
+        finally:
+            self._done(name)
+
+    def executemany(self, operation, set_of_parameters=[]):
+        with self._lock:
+            self.counts["primary"] += 1
+        if self.pin_writes:
+            self.in_transaction = True
+        return self._primary.executemany(operation, set_of_parameters)
+
+    def commit(self):
+        self.in_transaction = False
+        return self._primary.commit()
+
+    def rollback(self):
+        self.in_transaction = False
+        return self._primary.rollback()
+
+    def close(self):
+        for db in [self._primary] + self._replicas:
+            db.close()
+
+    def __getattr__(self, name):
+        return getattr(self._primary, name)
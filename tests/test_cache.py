@@ -0,0 +1,142 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sqlite3
+from pstyle.cache import QueryCache, ParseCache
+from pstyle.convert import Pstyle
+from pstyle.wrapper import DBWrapper
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.db = sqlite3.connect(":memory:")
+        cur = self.db.cursor()
+        cur.execute("create table tbl1 (id integer, val varchar)")
+        cur.execute("create table tbl2 (id integer, val varchar)")
+        cur.execute("insert into tbl1 (id, val) values (?, ?), (?, ?)", (0, "val1", 1, "val2"))
+        cur.close()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_hit(self):
+        cache = QueryCache()
+        wrapped = DBWrapper(self.db, sqlite3.paramstyle, "named", cache=cache)
+        cur = wrapped.execute("select * from tbl1 where id=:id", {"id": 1})
+        self.assertEqual(["id", "val"], [x[0] for x in cur.description])
+        self.assertEqual((1, "val2"), cur.fetchone())
+        self.assertIsNone(cur.fetchone())
+        self.assertEqual([(1, "val2")], wrapped.execute("select * from tbl1 where id=:id", {"id": 1}).fetchall())
+        self.assertEqual([(0, "val1")], list(wrapped.execute("select * from tbl1 where id=:id", {"id": 0})))
+        self.assertEqual({"size": 2, "hits": 1, "misses": 2, "invalidations": 0, "evictions": 0}, cache.stats())
+
+    def test_invalidate(self):
+        cache = QueryCache()
+        wrapped = DBWrapper(self.db, sqlite3.paramstyle, "qmark", cache=cache)
+        wrapped.execute("select count(*) from tbl1").fetchall()
+        wrapped.execute("select count(*) from tbl2").fetchall()
+        wrapped.execute("insert into tbl1 (id, val) values (?, ?)", (2, "val3"))
+        self.assertEqual(1, cache.invalidations)
+        self.assertEqual((3,), wrapped.execute("select count(*) from tbl1").fetchone())
+        self.assertEqual((0,), wrapped.execute("select count(*) from tbl2").fetchone())
+        self.assertEqual(1, cache.hits)
+        wrapped.cursor().executemany("insert into tbl2 (id, val) values (?, ?)", [(0, "a"), (1, "b")])
+        self.assertEqual(2, cache.invalidations)
+        self.assertEqual((2,), wrapped.execute("select count(*) from tbl2").fetchone())
+        wrapped.rollback()
+        self.assertEqual(0, cache.stats()["size"])
+
+    def test_lru(self):
+        cache = QueryCache(maxsize=2)
+        wrapped = DBWrapper(self.db, sqlite3.paramstyle, "qmark", cache=cache)
+        for i in [0, 1, 0, 2]:
+            wrapped.execute("select val from tbl1 where id=?", (i,)).fetchall()
+        self.assertEqual({"size": 2, "hits": 1, "misses": 3, "invalidations": 0, "evictions": 1}, cache.stats())
+        wrapped.execute("select val from tbl1 where id=?", (0,))
+        self.assertEqual(2, cache.hits)
+
+    def test_ttl(self):
+        cache = QueryCache(ttl=10)
+        wrapped = DBWrapper(self.db, sqlite3.paramstyle, "qmark", cache=cache)
+        with patch("time.monotonic", return_value=100.0):
+            wrapped.execute("select * from tbl1").fetchall()
+            wrapped.execute("select * from tbl1").fetchall()
+        with patch("time.monotonic", return_value=111.0):
+            wrapped.execute("select * from tbl1").fetchall()
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(2, cache.misses)
+
+    def test_uncacheable(self):
+        cache = QueryCache()
+        wrapped = DBWrapper(self.db, sqlite3.paramstyle, "qmark", cache=cache)
+        wrapped.execute("select * from tbl1 where id=?", [0]).fetchall()
+        self.assertIsNone(cache.key("select 1", ([1, 2],)))
+        cur = wrapped.execute("select * from tbl1 limit 2")
+        self.assertEqual([(0, "val1")], cur.fetchmany())
+        self.assertEqual([(1, "val2")], cur.fetchmany(5))
+        cur.close()
+        wrapped.execute("create table tbl3 (id integer)")
+        self.assertEqual(0, cache.invalidations)
+        wrapped.execute("analyze")   # unknown tables
+        self.assertEqual(2, cache.invalidations)
+
+    def test_unknown_tables(self):
+        cache = QueryCache()
+        self.db.execute("create table events (id integer)")
+        wrapped = DBWrapper(self.db, sqlite3.paramstyle, "qmark", cache=cache)
+        self.assertEqual((2,), wrapped.execute("select count(*) from (tbl1)").fetchone())
+        self.assertEqual((0,), wrapped.execute("select count(*) from tbl2 join events on tbl2.id=events.id").fetchone())
+        self.assertEqual((0,), wrapped.execute("select count(*) from tbl2").fetchone())
+        wrapped.execute("insert into tbl1 (id, val) values (?, ?)", (2, "val3"))
+        self.assertEqual(2, cache.invalidations)   # tbl2 is kept
+        self.assertEqual((3,), wrapped.execute("select count(*) from (tbl1)").fetchone())
+        wrapped.execute("insert into events (id) values (?)", (0,))
+        self.assertEqual(4, cache.invalidations)   # unrecognized table of write: drop all
+        self.assertEqual(0, cache.stats()["size"])
+
+    def test_write_select(self):
+        fakedb = MagicMock()
+        cache = QueryCache()
+        wrapped = DBWrapper(fakedb, "qmark", "qmark", cache=cache)
+        for sql in ["select * from tbl1 for update", "select * from tbl1 for share",
+                    "select * from tbl1 lock in share mode", "select * into tbl2 from tbl1",
+                    "with d as (delete from tbl1 returning *) select * from d"]:
+            wrapped.execute(sql)
+            wrapped.execute(sql)
+        self.assertEqual(10, fakedb.cursor.return_value.execute.call_count)
+        self.assertEqual({"size": 0, "hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}, cache.stats())
+
+
+class TestParseCache(unittest.TestCase):
+    def tearDown(self):
+        Pstyle.parse_cache = None
+
+    def test_default(self):
+        self.assertIsNone(Pstyle.parse_cache)
+
+    def test_hit(self):
+        cache = ParseCache()
+        Pstyle.parse_cache = cache
+        for _ in range(3):
+            self.assertEqual("SELECT * FROM t WHERE id=:arg0",
+                             Pstyle.convert("qmark", "named", "select * from t where id=?", [1])[0])
+        self.assertEqual({"size": 1, "hits": 2, "misses": 1, "skips": 0, "evictions": 0},
+                         {k: v for k, v in cache.stats().items() if k != "tokens"})
+        self.assertTrue(all(x.parent is None for stmt in cache.get("select 1; select 2") for x in stmt))
+
+    def test_skip(self):
+        cache = ParseCache(max_length=20)
+        cache.get("select * from t where id=?")
+        cache.get("select * from t where id=?")
+        self.assertEqual((0, 0, 2), (cache.stats()["size"], cache.stats()["misses"], cache.stats()["skips"]))
+
+    def test_evict(self):
+        cache = ParseCache(maxsize=2)
+        for i in range(3):
+            cache.get(f"select {i}")
+        self.assertEqual((2, 1), (cache.stats()["size"], cache.stats()["evictions"]))
+        cache = ParseCache(max_tokens=10)
+        cache.get("select 1")   # 3 tokens
+        cache.get("select a, b from t")   # 10 tokens
+        self.assertEqual((1, 10), (cache.stats()["size"], cache.stats()["tokens"]))
+        cache.clear()
+        self.assertEqual((0, 0), (cache.stats()["size"], cache.stats()["tokens"]))
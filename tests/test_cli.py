@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import patch, ANY
+from unittest.mock import patch, ANY, MagicMock
 from click.testing import CliRunner
 from pstyle.main import cli
 
@@ -57,6 +57,22 @@ class TestCLI(unittest.TestCase):
         self.assertIsNone(res.exception)
         self.assertIn("select * from tbl1 where id=?", res.output)
 
+    def test_serve_help(self):
+        res = CliRunner().invoke(cli, ["serve", "--help"])
+        if res.exception:
+            raise res.exception
+        self.assertEqual(0, res.exit_code)
+        self.assertIn("--unix", res.output)
+        self.assertIn("--workers", res.output)
+        self.assertIn("--limit", res.output)
+
+    def test_serve(self):
+        with patch("pstyle.server.ConvertServer.serve", new_callable=MagicMock) as serve, patch("asyncio.run") as run:
+            res = CliRunner().invoke(cli, ["serve", "--unix", "/tmp/pstyle.sock"])
+            self.assertEqual(0, res.exit_code)
+            serve.assert_called_once_with("/tmp/pstyle.sock", "127.0.0.1", 8765)
+            run.assert_called_once_with(serve.return_value)
+
     def test_list_drivers(self):
         res = CliRunner().invoke(cli, ["list-drivers"])
         if res.exception:
@@ -17,6 +17,8 @@ class TestConvert(unittest.TestCase):
         ("pyformat", "SELECT * FROM tbl1 WHERE id=%(arg0)s", {"arg0": 10}),
         ("numeric", "SELECT * FROM tbl1 WHERE id=:1", (10,)),
         ("named", "SELECT * FROM tbl1 WHERE id=:arg0", {"arg0": 10}),
+        ("dollar", "SELECT * FROM tbl1 WHERE id=$1", (10,)),
+        ("binary", "SELECT * FROM tbl1 WHERE id=%s", (10,)),
     ], [
         ("qmark", "SELECT tleft.c1 FROM tleft RIGHT JOIN tright ON tleft.c1 = tright.c1 WHERE tright.c1 <> ?", (2,)),
         ("format", "SELECT tleft.c1 FROM tleft RIGHT JOIN tright ON tleft.c1 = tright.c1 WHERE tright.c1 <> %s", (2,)),
@@ -31,6 +33,8 @@ class TestConvert(unittest.TestCase):
         ("pyformat", "SELECT c1+c2 FROM T GROUP BY c1+c2", {}),
         ("numeric", "SELECT c1+c2 FROM T GROUP BY c1+c2", ()),
         ("named", "SELECT c1+c2 FROM T GROUP BY c1+c2", {}),
+        ("dollar", "SELECT c1+c2 FROM T GROUP BY c1+c2", ()),
+        ("binary", "SELECT c1+c2 FROM T GROUP BY c1+c2", ()),
     ], [  # multiple args
         ("qmark", "SELECT c1, SUM(c2) AS total FROM T GROUP BY c3 HAVING SUM(c2) > ? WHERE c1 LIKE ?",
          (100, '%abc')),
@@ -48,6 +52,14 @@ class TestConvert(unittest.TestCase):
         ("numeric", "SELECT * FROM t WHERE `k1`<:1; -- select foo\n", (10,)),
         ("named", "SELECT * FROM t WHERE `k1`<:arg0; -- select foo\n", {"arg0": 10}),
         ("pyformat", "SELECT * FROM t WHERE `k1`<%(arg0)s; -- select foo\n", {"arg0": 10}),
+        ("dollar", "SELECT * FROM t WHERE `k1`<$1; -- select foo\n", (10,)),
+    ], [  # binary
+        ("qmark", "INSERT INTO t (id, blob1) VALUES (?, ?)", (10, b"\x00\x01")),
+        ("binary", "INSERT INTO t (id, blob1) VALUES (%s, %b)", (10, b"\x00\x01")),
+        ("format", "INSERT INTO t (id, blob1) VALUES (%s, %s)", (10, b"\x00\x01")),
+        ("numeric", "INSERT INTO t (id, blob1) VALUES (:1, :2)", (10, b"\x00\x01")),
+        ("dollar", "INSERT INTO t (id, blob1) VALUES ($1, $2)", (10, b"\x00\x01")),
+        ("named", "INSERT INTO t (id, blob1) VALUES (:arg0, :arg1)", {"arg0": 10, "arg1": b"\x00\x01"}),
     ]]
     # [0] -> [1:]
     testdata_map2 = [[
@@ -81,6 +93,56 @@ class TestConvert(unittest.TestCase):
         ("format", "SELECT * FROM tbl1 WHERE id=%s", ("hello",)),
         ("numeric", "SELECT * FROM tbl1 WHERE id=:1", ("hello",)),
         ("named", "SELECT * FROM tbl1 WHERE id=:arg0", {"arg0": "hello"}),
+    ], [
+        ("dollar", "SELECT * FROM tbl1 WHERE id=$2 AND val=$1 AND val2=$1", ("hello", 10)),
+        ("qmark", "SELECT * FROM tbl1 WHERE id=? AND val=? AND val2=?", (10, "hello", "hello")),
+        ("numeric", "SELECT * FROM tbl1 WHERE id=:1 AND val=:2 AND val2=:2", (10, "hello")),
+        ("named", "SELECT * FROM tbl1 WHERE id=:arg0 AND val=:arg1 AND val2=:arg1", {"arg0": 10, "arg1": "hello"}),
+    ], [  # repeated parameter
+        ("named", "SELECT * FROM t WHERE t1=:tenant_id AND id=:id AND t2=:tenant_id", {"tenant_id": 5, "id": 1}),
+        ("numeric", "SELECT * FROM t WHERE t1=:1 AND id=:2 AND t2=:1", (5, 1)),
+        ("dollar", "SELECT * FROM t WHERE t1=$1 AND id=$2 AND t2=$1", (5, 1)),
+        ("qmark", "SELECT * FROM t WHERE t1=? AND id=? AND t2=?", (5, 1, 5)),
+        ("format", "SELECT * FROM t WHERE t1=%s AND id=%s AND t2=%s", (5, 1, 5)),
+    ], [
+        ("pyformat", "SELECT * FROM t WHERE t1=%(tenant_id)s AND t2=%(tenant_id)s", {"tenant_id": 5}),
+        ("numeric", "SELECT * FROM t WHERE t1=:1 AND t2=:1", (5,)),
+        ("qmark", "SELECT * FROM t WHERE t1=? AND t2=?", (5, 5)),
+    ], [
+        ("numeric", "SELECT * FROM t WHERE t1=:1 AND id=:2 AND t2=:1", (5, 1)),
+        ("named", "SELECT * FROM t WHERE t1=:arg0 AND id=:arg1 AND t2=:arg0", {"arg0": 5, "arg1": 1}),
+        ("pyformat", "SELECT * FROM t WHERE t1=%(arg0)s AND id=%(arg1)s AND t2=%(arg0)s", {"arg0": 5, "arg1": 1}),
+        ("dollar", "SELECT * FROM t WHERE t1=$1 AND id=$2 AND t2=$1", (5, 1)),
+    ], [
+        ("auto", "SELECT * FROM t WHERE t1=:1 AND id=$2 AND t2=:1", (5, 1)),
+        ("named", "SELECT * FROM t WHERE t1=:arg0 AND id=:arg1 AND t2=:arg0", {"arg0": 5, "arg1": 1}),
+        ("pyformat", "SELECT * FROM t WHERE t1=%(arg0)s AND id=%(arg1)s AND t2=%(arg0)s", {"arg0": 5, "arg1": 1}),
+    ], [
+        ("auto", "SELECT * FROM t WHERE t1=:tenant AND id=%(id)s AND t2=:tenant", {"tenant": 5, "id": 1}),
+        ("named", "SELECT * FROM t WHERE t1=:tenant AND id=:id AND t2=:tenant", {"tenant": 5, "id": 1}),
+        ("numeric", "SELECT * FROM t WHERE t1=:1 AND id=:2 AND t2=:1", (5, 1)),
+    ], [
+        ("auto", "SELECT * FROM t WHERE t1=:1 AND id=? AND t2=:1", (5, 1)),
+        ("numeric", "SELECT * FROM t WHERE t1=:1 AND id=:2 AND t2=:1", (5, 1)),
+    ], [
+        ("auto", "SELECT * FROM tbl1 WHERE id=$2 and val=$1", ("hello", 10)),
+        ("qmark", "SELECT * FROM tbl1 WHERE id=? AND val=?", (10, "hello")),
+        ("named", "SELECT * FROM tbl1 WHERE id=:arg0 AND val=:arg1", {"arg0": 10, "arg1": "hello"}),
+        ("dollar", "SELECT * FROM tbl1 WHERE id=$1 AND val=$2", (10, "hello")),
+    ], [
+        ("auto", "SELECT * FROM tbl1 WHERE id=%s AND blob1=%b", (10, b"hello")),
+        ("qmark", "SELECT * FROM tbl1 WHERE id=? AND blob1=?", (10, b"hello")),
+        ("named", "SELECT * FROM tbl1 WHERE id=:arg0 AND blob1=:arg1", {"arg0": 10, "arg1": b"hello"}),
+        ("binary", "SELECT * FROM tbl1 WHERE id=%s AND blob1=%b", (10, b"hello")),
+    ], [  # a%b is modulo, not placeholder
+        ("binary", "SELECT a%b, (a)%b FROM tbl1 WHERE id=%s AND blob1=%b", (10, b"hello")),
+        ("qmark", "SELECT a%b, (a)%b FROM tbl1 WHERE id=? AND blob1=?", (10, b"hello")),
+        ("numeric", "SELECT a%b, (a)%b FROM tbl1 WHERE id=:1 AND blob1=:2", (10, b"hello")),
+    ], [
+        ("binary", "SELECT * FROM tbl1 WHERE id=%s AND blob1=%b", (10, b"hello")),
+        ("qmark", "SELECT * FROM tbl1 WHERE id=? AND blob1=?", (10, b"hello")),
+        ("named", "SELECT * FROM tbl1 WHERE id=:arg0 AND blob1=:arg1", {"arg0": 10, "arg1": b"hello"}),
+        ("dollar", "SELECT * FROM tbl1 WHERE id=$1 AND blob1=$2", (10, b"hello")),
     ],]
 
     def test_convert(self):
@@ -101,3 +163,95 @@ class TestConvert(unittest.TestCase):
     def test_convert_notimpl(self):
         with self.assertRaises(NotImplementedError):
             Pstyle.convert("qmark", "auto", "SELECT * from t WHERE val=?", ("hello",))
+
+    def test_statement_types(self):
+        self.assertEqual(["SELECT"], Pstyle.statement_types("with a as (select 1) select * from a"))
+        self.assertEqual(["SELECT", "INSERT"], Pstyle.statement_types("select 1; insert into t values (?)"))
+        self.assertEqual(["BEGIN"], Pstyle.statement_types("begin"))
+        self.assertEqual([], Pstyle.statement_types(""))
+
+    def test_tables(self):
+        self.assertEqual({"t1", "t2", "t3", "t4"}, Pstyle.tables(
+            "SELECT * FROM s.t1 a LEFT JOIN `t2` AS b ON a.id=b.id, t3 WHERE x IN (SELECT y FROM t4)"))
+        self.assertEqual({"t1", "t2"}, Pstyle.tables("INSERT INTO t1 (a, b) SELECT a, b FROM t2 ORDER BY a, b"))
+        self.assertEqual({"t1"}, Pstyle.tables("UPDATE t1 SET a=?"))
+        self.assertEqual({"t1"}, Pstyle.tables("DROP TABLE IF EXISTS t1"))
+        self.assertEqual(set(), Pstyle.tables("SELECT 1"))
+        self.assertEqual({"t1"}, Pstyle.known_tables("INSERT INTO t1 (a) VALUES (1) ON CONFLICT (a) DO UPDATE SET a=2"))
+        self.assertEqual({"t1"}, Pstyle.known_tables("SELECT * FROM (SELECT * FROM t1) x FOR UPDATE"))
+        self.assertEqual(set(), Pstyle.known_tables("SELECT 1"))
+        # keyword as table name, parenthesized table, table function
+        self.assertEqual({"t1"}, Pstyle.tables("SELECT * FROM t1 JOIN events e ON t1.id=e.id"))
+        self.assertIsNone(Pstyle.known_tables("SELECT * FROM t1 JOIN events e ON t1.id=e.id"))
+        self.assertIsNone(Pstyle.known_tables("SELECT count(*) FROM (t1)"))
+        self.assertIsNone(Pstyle.known_tables("SELECT * FROM generate_series(1, 3)"))
+        self.assertIsNone(Pstyle.known_tables("INSERT INTO user VALUES (1)"))
+
+    def test_parameterize(self):
+        self.assertEqual(
+            ("SELECT * FROM t WHERE id=? AND v=? AND w=? AND d=DATE '2020-01-01' ORDER BY 1 DESC, 2 LIMIT 5 OFFSET 3",
+             ("A", 42, "it's")),
+            Pstyle.convert("qmark", "qmark", "SELECT * FROM t WHERE id=? AND v=42 AND w='it''s' "
+                           "AND d=DATE '2020-01-01' ORDER BY 1 DESC, 2 LIMIT 5 OFFSET 3", ("A",), parameterize=True))
+        self.assertEqual(
+            ("SELECT a-?, ? FROM t WHERE id=? AND v=?", (1, -2.5, "A", 10)),
+            Pstyle.convert("format", "qmark", "select a-1, -2.5 from t where id=%s and v=10", ("A",),
+                           parameterize=True))
+        self.assertEqual(
+            ("SELECT * FROM t WHERE id=$1 AND v=$2", ("A", 10)),
+            Pstyle.convert("numeric", "dollar", "select * from t where id=:1 and v=10", ("A",), parameterize=True))
+        self.assertEqual(
+            ("UPDATE t SET v=:lit0 WHERE id=:id", {"id": "A", "lit0": "x"}),
+            Pstyle.convert("pyformat", "named", "update t set v='x' where id=%(id)s", {"id": "A"},
+                           parameterize=True))
+        self.assertEqual(
+            ("SELECT * FROM t WHERE a=? AND b=? AND c=?", ("y", 5, "x")),
+            Pstyle.convert("auto", "qmark", "select * from t where a=$2 and b=5 and c=$1", ("x", "y"),
+                           parameterize=True))
+        self.assertEqual(
+            ("SELECT * FROM t WHERE a=:1 AND b=:2 AND c=:3", ("y", 5, "x")),
+            Pstyle.convert("auto", "numeric", "select * from t where a=:2 and b=5 and c=:1", ("x", "y"),
+                           parameterize=True))
+        self.assertEqual(
+            ("SELECT * FROM t WHERE a=? AND b=? AND c=?", ("x", 5, "y")),
+            Pstyle.convert("auto", "qmark", "select * from t where a=? and b=5 and c=%s", ("x", "y"),
+                           parameterize=True))
+        with self.assertRaises(ValueError):
+            Pstyle.convert("auto", "qmark", "select * from t where a=:2 and b=5 and c=?", ("x", "y"),
+                           parameterize=True)
+        self.assertEqual(
+            ("SELECT CAST(a AS varchar(10)), a::numeric(10,2), CAST('1' AS int), b::mytype(3), f(?) FROM t", (1,)),
+            Pstyle.convert("qmark", "qmark", "SELECT CAST(a AS varchar(10)), a::numeric(10,2), CAST('1' AS int), "
+                           "b::mytype(3), f(1) FROM t", (), parameterize=True))
+        self.assertEqual(
+            ("SELECT * FROM t WHERE c=? ORDER BY a COLLATE nocase, 2 NULLS FIRST, (SELECT ? FROM u ORDER BY 1), 3",
+             ("x", 1)),
+            Pstyle.convert("qmark", "qmark", "SELECT * FROM t WHERE c='x' ORDER BY a COLLATE nocase, 2 NULLS FIRST, "
+                           "(SELECT 1 FROM u ORDER BY 1), 3", (), parameterize=True))
+        # expressions of grouped query must match
+        self.assertEqual(
+            ("SELECT c1+1, (SELECT max(x)+$1 FROM u) FROM t WHERE c2=$2 GROUP BY c1+1 HAVING count(*) > 2 "
+             "ORDER BY c1+1", (1, 5)),
+            Pstyle.convert("qmark", "dollar", "select c1+1, (select max(x)+1 from u) from t where c2=5 "
+                           "group by c1+1 having count(*) > 2 order by c1+1", (), parameterize=True))
+        self.assertEqual(
+            ("select distinct c1+1 from t where c2=? order by c1+1", (5,)),
+            Pstyle.convert("qmark", "qmark", "select distinct c1+1 from t where c2=5 order by c1+1", (),
+                           parameterize=True))
+        self.assertEqual(
+            ("select a from t where c2=? union select b+1 from u where d=? group by b+1", (5, 6)),
+            Pstyle.convert("qmark", "qmark", "select a from t where c2=5 union select b+1 from u where d=6 "
+                           "group by b+1", (), parameterize=True))
+        # %% is escaped % in format/pyformat
+        for style, args in [("format", (1,)), ("binary", (1,)), ("auto", (1,)), ("pyformat", {"b": 1})]:
+            placeholder = "%(b)s" if style == "pyformat" else "%s"
+            self.assertEqual(
+                ("SELECT * FROM t WHERE a like ? AND b=?", ("x%", 1)),
+                Pstyle.convert(style, "qmark", f"select * from t where a like 'x%%' and b={placeholder}", args,
+                               parameterize=True), style)
+        self.assertEqual(
+            ("SELECT * FROM t WHERE a like ? AND b=?", ("x%%", 1)),
+            Pstyle.convert("auto", "qmark", "select * from t where a like 'x%%' and b=?", (1,), parameterize=True))
+        self.assertEqual(
+            ("CREATE TABLE t (id int DEFAULT 0)", ()),
+            Pstyle.convert("qmark", "format", "create table t (id int default 0)", (), parameterize=True))
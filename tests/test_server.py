@@ -0,0 +1,106 @@
+import unittest
+import asyncio
+import json
+import tempfile
+from unittest.mock import MagicMock
+from pathlib import Path
+from pstyle.convert import Pstyle
+from pstyle.server import ConvertServer, convert_request
+
+
+class TestServer(unittest.TestCase):
+    def test_convert_request(self):
+        self.assertEqual({"operation": "SELECT * FROM t WHERE id=?", "args": [10]}, convert_request({
+            "from_style": "named", "to_style": "qmark", "operation": "select * from t where id=:id",
+            "args": {"id": 10}}))
+        self.assertEqual({"operation": "SELECT * FROM t WHERE id=:1", "args": [10]}, convert_request({
+            "from_style": "qmark", "to_style": "numeric", "operation": "select * from t where id=?", "args": [10]}))
+        self.assertEqual({"operation": "select * from t where id=?", "args": [10]}, convert_request({
+            "to_style": "qmark", "operation": "select * from t where id=10", "normalize": False,
+            "parameterize": True}))
+        self.assertIn("error", convert_request({"to_style": "qmark"}))
+        self.assertIn("NotImplementedError", convert_request({
+            "from_style": "qmark", "to_style": "auto", "operation": "select 1"})["error"])
+
+    async def _roundtrip(self, server: ConvertServer, unix: str, lines: list[str]) -> list[dict]:
+        srv = await server.start(unix=unix)
+        try:
+            reader, writer = await asyncio.open_unix_connection(unix)
+            writer.write("".join(x + "\n" for x in lines).encode())   # pipelined
+            await writer.drain()
+            writer.write_eof()
+            res = [json.loads(x) async for x in reader]
+            writer.close()
+            return res
+        finally:
+            srv.close()
+            await srv.wait_closed()
+
+    def _run(self, workers: int):
+        server = ConvertServer(workers)
+        reqs = [json.dumps({"id": i, "from_style": "qmark", "to_style": "named",
+                            "operation": "select * from t where id=?", "args": [i]}) for i in range(5)]
+        reqs += ["", "invalid", "[]", json.dumps({"command": "hello"}), json.dumps({"id": "s", "command": "stats"})]
+        with tempfile.TemporaryDirectory() as td:
+            res = asyncio.run(self._roundtrip(server, str(Path(td) / "sock"), reqs))
+        server.close()
+        self.assertEqual(9, len(res))
+        for i in range(5):
+            self.assertEqual({"id": i, "operation": "SELECT * FROM t WHERE id=:arg0", "args": {"arg0": i}}, res[i])
+        self.assertIn("invalid request", res[5]["error"])
+        self.assertIn("invalid request", res[6]["error"])
+        self.assertIn("invalid command", res[7]["error"])
+        self.assertEqual("s", res[8]["id"])
+        stats = res[8]["stats"]
+        self.assertEqual(workers, stats["workers"])
+        self.assertEqual(1, stats["connections"])
+        self.assertEqual(9, stats["requests"])
+        self.assertEqual(3, stats["errors"])
+        if workers:
+            self.assertNotIn("cache", stats)
+        else:
+            cache = stats["cache"]
+            self.assertEqual((1, 1, 4), (cache["size"], cache["misses"], cache["hits"]))
+        self.assertIsNone(Pstyle.parse_cache)
+
+    def test_serve(self):
+        self._run(0)
+
+    def test_serve_workers(self):
+        self._run(2)
+
+    def test_limit(self):
+        server = ConvertServer(limit=120)
+        req = {"from_style": "qmark", "to_style": "named", "operation": "select * from t where id=?", "args": [1]}
+        reqs = [json.dumps(req), json.dumps(dict(req, args=["x" * 120])),
+                json.dumps(dict(req, args=["x" * 100000])), json.dumps(dict(req, id=3))]
+        with tempfile.TemporaryDirectory() as td:
+            res = asyncio.run(self._roundtrip(server, str(Path(td) / "sock"), reqs))
+        server.close()
+        self.assertEqual(4, len(res))
+        self.assertEqual({"arg0": 1}, res[0]["args"])
+        self.assertIn("request too long", res[1]["error"])
+        self.assertIn("request too long", res[2]["error"])
+        self.assertEqual(3, res[3]["id"])
+        self.assertEqual(4, server.requests)
+        self.assertEqual(2, server.errors)
+
+    def test_cancel(self):
+        async def run():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'{"command": "stats"}\n')
+            writer = MagicMock()
+            writer.drain = MagicMock(side_effect=lambda: asyncio.sleep(0))
+            server = ConvertServer()
+            task = asyncio.create_task(server.handle(reader, writer))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            writer.close.assert_called_once_with()
+            await asyncio.sleep(0)
+            self.assertEqual({asyncio.current_task()}, asyncio.all_tasks())   # writer task is not left
+            server.close()
+            return writer
+        writer = asyncio.run(run())
+        self.assertIn(b'"stats"', writer.write.call_args.args[0])